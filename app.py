@@ -1,11 +1,9 @@
-from flask import Flask, request, Response, jsonify
+from flask import Blueprint, Flask, current_app, request, Response, jsonify
 from twilio.twiml.voice_response import VoiceResponse, Gather
-import requests
-import sqlite3
 import os
+import threading
 from datetime import datetime
-from elevenlabs import ElevenLabs
-from twilio_handler import TwilioHandler
+import database
 import logging
 
 # Configure logging
@@ -16,77 +14,139 @@ logger = logging.getLogger(__name__)
 TWILIO_NUMBER = os.getenv("TWILIO_NUMBER")
 ELEVEN_API_KEY = os.getenv("ELEVENLABS_API_KEY")
 
-# === Flask Setup ===
-app = Flask(__name__)
-
-# === Twilio Handler Setup ===
-try:
-    twilio_handler = TwilioHandler()
-except Exception as e:
-    logger.error(f"Failed to initialize Twilio handler: {e}")
-    twilio_handler = None
-
-# === SQLite Setup ===
-DB_FILE = 'edc_responses.db'
-
-def init_db():
-    with sqlite3.connect(DB_FILE) as conn:
-        conn.execute('''
-            CREATE TABLE IF NOT EXISTS users (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT,
-                dob TEXT,
-                email TEXT,
-                start_date TEXT,
-                course TEXT,
-                intent TEXT,
-                response TEXT,
-                call_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        # Add table for call tracking
-        conn.execute('''
-            CREATE TABLE IF NOT EXISTS call_logs (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                call_sid TEXT UNIQUE,
-                to_number TEXT,
-                from_number TEXT,
-                status TEXT,
-                direction TEXT,
-                duration INTEGER,
-                start_time TIMESTAMP,
-                end_time TIMESTAMP,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
+# Per-turn budget for ElevenLabs before falling back to cached audio or <Say>
+TTS_LATENCY_BUDGET = float(os.getenv("TTS_LATENCY_BUDGET", "1.5"))
+
+# Concurrent answered calls the agents/IVR can take during an outbound campaign
+CAMPAIGN_CAPACITY = int(os.getenv("CAMPAIGN_CAPACITY", "5"))
+
+# === Routes ===
+# Routes live on a blueprint so the Flask app is only built by create_app()
+bp = Blueprint("voice_agent", __name__)
+
+# Guards lazy construction of per-app helpers; reentrant because one
+# helper's factory may need another (e.g. a dialer needs the Twilio handler)
+_extensions_lock = threading.RLock()
+
+# === Application Factory ===
+def create_app(config=None):
+    """
+    Build the Flask application
+
+    Cheap to call: the Twilio SDK is only imported when a request first
+    needs it, and the ElevenLabs SDK loads in a background thread (set
+    TTS_WARMUP to False to skip that). The database schema is created once per
+    process, however many apps or workers call this.
+
+    Args:
+        config (dict): Overrides for the app config, e.g. DB_FILE (optional)
+
+    Returns:
+        Flask: The configured application
+    """
+    app = Flask(__name__)
+    app.config["DB_FILE"] = database.DB_FILE
+    app.config["TTS_LATENCY_BUDGET"] = TTS_LATENCY_BUDGET
+    app.config["TTS_WARMUP"] = True
+    app.config["CAMPAIGN_CAPACITY"] = CAMPAIGN_CAPACITY
+    if config:
+        app.config.update(config)
+
+    database.init_db(app.config["DB_FILE"])
+    app.register_blueprint(bp)
+
+    if app.config["TTS_WARMUP"]:
+        # Import the TTS SDK in the background so the first caller's turn doesn't pay for it
+        warmup = threading.Thread(target=_warm_up_tts, args=(app,), name="tts-warmup", daemon=True)
+        app.extensions["tts_warmup"] = warmup
+        warmup.start()
+    return app
+
+def _warm_up_tts(app):
+    """Build the TTS chain and load its provider SDK off the request path"""
+    try:
+        with app.app_context():
+            get_tts_chain().warm_up()
+    except Exception as e:
+        logger.error(f"TTS warm-up failed: {e}")
+
+def _get_extension(name, factory):
+    """Build a per-app helper object on first use and cache it"""
+    extensions = current_app.extensions
+    if name not in extensions:
+        with _extensions_lock:
+            if name not in extensions:
+                extensions[name] = factory()
+    return extensions[name]
+
+def _create_twilio_handler():
+    # Imported here so the Twilio REST client only loads when a call needs it
+    from twilio_handler import TwilioHandler
+    try:
+        return TwilioHandler()
+    except Exception as e:
+        logger.error(f"Failed to initialize Twilio handler: {e}")
+        return None
+
+def get_twilio_handler():
+    """Get the app's TwilioHandler, or None if Twilio is not configured"""
+    return _get_extension("twilio_handler", _create_twilio_handler)
+
+def get_tts_chain():
+    """Get the app's TTS fallback chain"""
+    def factory():
+        from tts_provider import TTSFallbackChain
+        return TTSFallbackChain(latency_budget=current_app.config["TTS_LATENCY_BUDGET"])
+    return _get_extension("tts_chain", factory)
+
+def get_pacing_controller():
+    """
+    Get the controller for the running campaign
+
+    The controller is kept for the app, so stats carry across requests, but
+    once a campaign has finished (nothing queued, ringing or live) the next
+    one starts on a fresh controller with fresh rolling stats and counters.
+    """
+    twilio_handler = get_twilio_handler()
+    from pacing import AdaptivePacingController
+    with _extensions_lock:
+        controller = current_app.extensions.get("pacing_controller")
+        if controller is None or controller.is_idle():
+            controller = AdaptivePacingController(twilio_handler, capacity=current_app.config["CAMPAIGN_CAPACITY"])
+            current_app.extensions["pacing_controller"] = controller
+        return controller
 
 # === Helper: Save to DB ===
 def save_response(intent, field, value):
-    with sqlite3.connect(DB_FILE) as conn:
-        conn.execute("INSERT INTO users (intent, response) VALUES (?, ?)", (intent, f"{field}:{value}"))
+    database.save_response(intent, field, value, db_file=current_app.config["DB_FILE"])
 
 # === Helper: Save Call Log ===
 def save_call_log(call_sid, to_number, from_number, status, direction, duration=None, start_time=None, end_time=None):
-    with sqlite3.connect(DB_FILE) as conn:
-        conn.execute("""
-            INSERT OR REPLACE INTO call_logs 
-            (call_sid, to_number, from_number, status, direction, duration, start_time, end_time)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-        """, (call_sid, to_number, from_number, status, direction, duration, start_time, end_time))
+    database.save_call_log(call_sid, to_number, from_number, status, direction, duration, start_time, end_time,
+                           db_file=current_app.config["DB_FILE"])
+
+# === Helper: Dial Campaign ===
+def start_campaign_dialer(controller):
+    """Dial the campaign queue in the background, logging each call placed"""
+    db_file = current_app.config["DB_FILE"]
+    def log_calls(placed):
+        for call_info in placed:
+            database.save_call_log(
+                call_sid=call_info['sid'],
+                to_number=call_info['to'],
+                from_number=call_info['from'],
+                status=call_info['status'],
+                direction='outbound',
+                db_file=db_file
+            )
+    controller.start(on_dial=log_calls)
 
 # === Helper: ElevenLabs TTS ===
-def eleven_tts(text):
-    try:
-        client = ElevenLabs(api_key=os.getenv("ELEVENLABS_API_KEY"))
-        audio = client.generate(text=text, voice="Rachel")
-        with open("static/response.mp3", "wb") as f:
-            f.write(audio)
-    except Exception as e:
-        logger.error(f"Error generating TTS: {e}")
+def eleven_tts(text, generic_text=None, cacheable=True):
+    return get_tts_chain().synthesize(text, generic_text=generic_text, cacheable=cacheable)
 
 # === Outbound Call Endpoint ===
-@app.route("/make-call", methods=["POST"])
+@bp.route("/make-call", methods=["POST"])
 def make_outbound_call():
     """Endpoint to initiate outbound calls"""
     try:
@@ -96,6 +156,7 @@ def make_outbound_call():
         if not to_number:
             return jsonify({'error': 'to_number is required'}), 400
         
+        twilio_handler = get_twilio_handler()
         if not twilio_handler:
             return jsonify({'error': 'Twilio handler not initialized'}), 500
         
@@ -119,7 +180,7 @@ def make_outbound_call():
         return jsonify({'error': str(e)}), 500
 
 # === Call Status Webhook ===
-@app.route("/call-status", methods=["POST"])
+@bp.route("/call-status", methods=["POST"])
 def call_status_webhook():
     """Handle call status updates from Twilio"""
     try:
@@ -143,14 +204,52 @@ def call_status_webhook():
             end_time=datetime.now() if call_status in ['completed', 'failed', 'busy', 'no-answer'] else None
         )
         
+        # Feed campaign calls back into pacing; the background dialer fills freed capacity
+        controller = current_app.extensions.get("pacing_controller")
+        if controller and controller.record_status(call_sid, call_status, call_duration):
+            controller.notify()
+        
         return Response(status=200)
         
     except Exception as e:
         logger.error(f"Error handling call status: {e}")
         return Response(status=500)
 
+# === Outbound Campaign Endpoints ===
+@bp.route("/campaign", methods=["POST"])
+def start_campaign():
+    """Queue numbers for an adaptively paced outbound campaign"""
+    try:
+        data = request.get_json()
+        numbers = data.get('numbers')
+        
+        if not numbers or not isinstance(numbers, list):
+            return jsonify({'error': 'numbers must be a non-empty list'}), 400
+        
+        if not get_twilio_handler():
+            return jsonify({'error': 'Twilio handler not initialized'}), 500
+        
+        controller = get_pacing_controller()
+        controller.add_numbers(numbers)
+        start_campaign_dialer(controller)
+        
+        logger.info(f"Campaign queued {len(numbers)} numbers")
+        return jsonify(controller.get_stats()), 200
+        
+    except Exception as e:
+        logger.error(f"Error starting campaign: {e}")
+        return jsonify({'error': str(e)}), 500
+
+@bp.route("/campaign", methods=["GET"])
+def campaign_stats():
+    """Report answer rate, handle time and dial concurrency for the current or last campaign"""
+    controller = current_app.extensions.get("pacing_controller")
+    if not controller:
+        return jsonify({'error': 'No campaign has been started'}), 404
+    return jsonify(controller.get_stats()), 200
+
 # === Webhook: Voice ===
-@app.route("/voice", methods=["POST"])
+@bp.route("/voice", methods=["POST"])
 def voice():
     try:
         # Log incoming call details
@@ -175,29 +274,29 @@ def voice():
         response = VoiceResponse()
 
         if "inquiry" in intent:
-            eleven_tts("Which service are you interested in? Car beginner or heavy vehicle?")
+            prompt = eleven_tts("Which service are you interested in? Car beginner or heavy vehicle?")
             gather = Gather(input="speech", action="/inquiry", method="POST")
-            gather.play(url="/static/response.mp3")
+            prompt.apply(gather)
             response.append(gather)
         elif "register" in intent:
-            eleven_tts("What is your full name?")
+            prompt = eleven_tts("What is your full name?")
             gather = Gather(input="speech", action="/register_name", method="POST")
-            gather.play(url="/static/response.mp3")
+            prompt.apply(gather)
             response.append(gather)
         elif "reschedule" in intent:
-            eleven_tts("Please say your email to find your record for rescheduling.")
+            prompt = eleven_tts("Please say your email to find your record for rescheduling.")
             gather = Gather(input="speech", action="/reschedule", method="POST")
-            gather.play(url="/static/response.mp3")
+            prompt.apply(gather)
             response.append(gather)
         elif "cancel" in intent:
-            eleven_tts("Please say your email to find your record for cancellation.")
+            prompt = eleven_tts("Please say your email to find your record for cancellation.")
             gather = Gather(input="speech", action="/cancel", method="POST")
-            gather.play(url="/static/response.mp3")
+            prompt.apply(gather)
             response.append(gather)
         else:
-            eleven_tts("Welcome to Education Driving Center. Please say Inquiry, Register, Reschedule or Cancel.")
+            prompt = eleven_tts("Welcome to Education Driving Center. Please say Inquiry, Register, Reschedule or Cancel.")
             gather = Gather(input="speech", action="/voice", method="POST")
-            gather.play(url="/static/response.mp3")
+            prompt.apply(gather)
             response.append(gather)
 
         return Response(str(response), mimetype='text/xml')
@@ -209,10 +308,11 @@ def voice():
         return Response(str(response), mimetype='text/xml')
 
 # === Call Management Endpoints ===
-@app.route("/call-status/<call_sid>", methods=["GET"])
+@bp.route("/call-status/<call_sid>", methods=["GET"])
 def get_call_status(call_sid):
     """Get the status of a specific call"""
     try:
+        twilio_handler = get_twilio_handler()
         if not twilio_handler:
             return jsonify({'error': 'Twilio handler not initialized'}), 500
         
@@ -223,10 +323,11 @@ def get_call_status(call_sid):
         logger.error(f"Error getting call status: {e}")
         return jsonify({'error': str(e)}), 500
 
-@app.route("/hangup/<call_sid>", methods=["POST"])
+@bp.route("/hangup/<call_sid>", methods=["POST"])
 def hangup_call(call_sid):
     """Hang up a specific call"""
     try:
+        twilio_handler = get_twilio_handler()
         if not twilio_handler:
             return jsonify({'error': 'Twilio handler not initialized'}), 500
         
@@ -237,73 +338,91 @@ def hangup_call(call_sid):
         logger.error(f"Error hanging up call: {e}")
         return jsonify({'error': str(e)}), 500
 
+@bp.route("/tts-metrics", methods=["GET"])
+def tts_metrics():
+    """Report how often each TTS fallback tier served a prompt"""
+    return jsonify(get_tts_chain().get_metrics()), 200
+
 # === Inquiry Route ===
-@app.route("/inquiry", methods=["POST"])
+@bp.route("/inquiry", methods=["POST"])
 def inquiry():
     service = request.values.get("SpeechResult", "")
     save_response("inquiry", "service", service)
-    eleven_tts(f"Thanks. Would you like to register now for {service} course?")
+    prompt = eleven_tts(
+        f"Thanks. Would you like to register now for {service} course?",
+        generic_text="Thanks. Would you like to register now for the course?",
+        # Built from caller speech, so keep it out of the public audio cache
+        cacheable=False
+    )
     response = VoiceResponse()
     gather = Gather(input="speech", action="/inquiry_register", method="POST")
-    gather.play(url="/static/response.mp3")
+    prompt.apply(gather)
     response.append(gather)
     return Response(str(response), mimetype='text/xml')
 
 # === Registration Flow ===
-@app.route("/register_name", methods=["POST"])
+@bp.route("/register_name", methods=["POST"])
 def register_name():
     name = request.values.get("SpeechResult", "")
     save_response("register", "name", name)
-    eleven_tts("What is your date of birth?")
+    prompt = eleven_tts("What is your date of birth?")
     response = VoiceResponse()
     gather = Gather(input="speech", action="/register_dob", method="POST")
-    gather.play(url="/static/response.mp3")
+    prompt.apply(gather)
     response.append(gather)
     return Response(str(response), mimetype='text/xml')
 
-@app.route("/register_dob", methods=["POST"])
+@bp.route("/register_dob", methods=["POST"])
 def register_dob():
     dob = request.values.get("SpeechResult", "")
     save_response("register", "dob", dob)
-    eleven_tts("What is your email address?")
+    prompt = eleven_tts("What is your email address?")
     response = VoiceResponse()
     gather = Gather(input="speech", action="/register_email", method="POST")
-    gather.play(url="/static/response.mp3")
+    prompt.apply(gather)
     response.append(gather)
     return Response(str(response), mimetype='text/xml')
 
-@app.route("/register_email", methods=["POST"])
+@bp.route("/register_email", methods=["POST"])
 def register_email():
     email = request.values.get("SpeechResult", "")
     save_response("register", "email", email)
-    eleven_tts("When would you like to start your course?")
+    prompt = eleven_tts("When would you like to start your course?")
     response = VoiceResponse()
     gather = Gather(input="speech", action="/register_date", method="POST")
-    gather.play(url="/static/response.mp3")
+    prompt.apply(gather)
     response.append(gather)
     return Response(str(response), mimetype='text/xml')
 
-@app.route("/register_date", methods=["POST"])
+@bp.route("/register_date", methods=["POST"])
 def register_date():
     date = request.values.get("SpeechResult", "")
     save_response("register", "start_date", date)
-    eleven_tts("Which course do you want to start?")
+    prompt = eleven_tts("Which course do you want to start?")
     response = VoiceResponse()
     gather = Gather(input="speech", action="/register_course", method="POST")
-    gather.play(url="/static/response.mp3")
+    prompt.apply(gather)
     response.append(gather)
     return Response(str(response), mimetype='text/xml')
 
-@app.route("/register_course", methods=["POST"])
+@bp.route("/register_course", methods=["POST"])
 def register_course():
     course = request.values.get("SpeechResult", "")
     save_response("register", "course", course)
-    eleven_tts("Your registration is complete. We will contact you soon. Thank you.")
+    prompt = eleven_tts("Your registration is complete. We will contact you soon. Thank you.")
     response = VoiceResponse()
-    response.play(url="/static/response.mp3")
+    prompt.apply(response)
     return Response(str(response), mimetype='text/xml')
 
+# === Module-level app ===
+def __getattr__(name):
+    """Build `app` on first access so `gunicorn app:app` works without import-time setup"""
+    if name == "app":
+        global app
+        app = create_app()
+        return app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 # === Main ===
 if __name__ == '__main__':
-    init_db()
-    app.run(host="0.0.0.0", port=5000, debug=True)
+    create_app().run(host="0.0.0.0", port=5000, debug=True)
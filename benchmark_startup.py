@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Benchmark worker cold start: import time and time to the first /voice turn
+"""
+
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+import tempfile
+
+# Runs inside a fresh interpreter so every sample is a true cold start.
+# The first request is /voice, the first thing a cold worker sees in a call
+# spike, so the TTS chain and ElevenLabs SDK load are part of the timing.
+PROBE = r"""
+import json, sys, time
+sys.path.insert(0, sys.argv[1])
+started = time.perf_counter()
+import app
+imported = time.perf_counter()
+flask_app = app.create_app({"DB_FILE": sys.argv[2], "TESTING": True, "TTS_WARMUP": sys.argv[3] != "off"})
+created = time.perf_counter()
+if sys.argv[3] == "finished":
+    # Worker booted before traffic arrived: let the background warm-up complete
+    flask_app.extensions["tts_warmup"].join()
+ready = time.perf_counter()
+response = flask_app.test_client().post("/voice", data={
+    "CallSid": "CA_BENCHMARK",
+    "To": "+10000000000",
+    "From": "+10000000001",
+    "Direction": "inbound",
+})
+answered = time.perf_counter()
+metrics = flask_app.extensions["tts_chain"].get_metrics()
+print(json.dumps({
+    "import": imported - started,
+    "create_app": created - imported,
+    "first_voice": answered - ready,
+    "status": response.status_code,
+    "budget_missed": metrics["primary_timeouts"] > 0,
+}))
+"""
+
+# Warm-up modes: skipped, still running when the call arrives, done before it arrives
+SCENARIOS = (
+    ("no warm-up", "off"),
+    ("warm-up, immediate call", "immediate"),
+    ("warm-up finished", "finished"),
+)
+
+
+def run_probe(work_dir, db_file, warmup):
+    """
+    Start a fresh interpreter and time app startup
+
+    Runs without ELEVENLABS_API_KEY so the provider loads its SDK but fails
+    fast instead of calling the API, and from a scratch directory so no
+    cached prompt audio is found.
+
+    Args:
+        work_dir (str): Scratch working directory for the probe
+        db_file (str): Scratch SQLite database for the probe request
+        warmup (str): TTS warm-up mode, one of off/immediate/finished
+
+    Returns:
+        dict: Timings in seconds for each startup phase
+    """
+    app_dir = os.path.dirname(os.path.abspath(__file__))
+    env = dict(os.environ)
+    env.pop("ELEVENLABS_API_KEY", None)
+    output = subprocess.check_output(
+        [sys.executable, "-c", PROBE, app_dir, db_file, warmup],
+        cwd=work_dir,
+        env=env,
+        stderr=subprocess.DEVNULL
+    )
+    return json.loads(output.decode().strip().splitlines()[-1])
+
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description="Measure app.py cold start")
+    parser.add_argument("--runs", type=int, default=10, help="number of cold starts to sample per scenario")
+    args = parser.parse_args()
+
+    print("=== Startup Benchmark ===")
+    print()
+    print(f"Runs per scenario: {args.runs}")
+    print(f"{'scenario':>24} {'import':>9} {'create_app':>11} {'first /voice':>13} {'budget missed':>14}")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for name, warmup in SCENARIOS:
+            samples = []
+            for i in range(args.runs):
+                # A fresh database each run so schema creation is part of the sample
+                result = run_probe(tmp_dir, os.path.join(tmp_dir, f"bench_{warmup}_{i}.db"), warmup)
+                if result["status"] != 200:
+                    print(f"Probe request failed with status {result['status']}")
+                    sys.exit(1)
+                samples.append(result)
+
+            medians = {phase: statistics.median(sample[phase] * 1000 for sample in samples)
+                       for phase in ("import", "create_app", "first_voice")}
+            missed = sum(sample["budget_missed"] for sample in samples)
+            print(f"{name:>24} {medians['import']:>7.1f}ms {medians['create_app']:>9.1f}ms "
+                  f"{medians['first_voice']:>11.1f}ms {missed:>8}/{args.runs}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+import os
+import sqlite3
+import threading
+import logging
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DB_FILE = os.getenv("DB_FILE", "edc_responses.db")
+
+# Databases whose schema has already been created by this process
+_initialized = set()
+_init_lock = threading.Lock()
+
+
+def init_db(db_file=DB_FILE):
+    """
+    Create the application tables once per process
+
+    Safe to call from every worker and every app instance: the first call
+    for a database file runs the DDL, later calls return immediately.
+
+    Args:
+        db_file (str): Path to the SQLite database file
+
+    Returns:
+        bool: True if the schema was created by this call
+    """
+    key = os.path.abspath(db_file)
+    if key in _initialized:
+        return False
+
+    with _init_lock:
+        if key in _initialized:
+            return False
+
+        with sqlite3.connect(db_file) as conn:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS users (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    name TEXT,
+                    dob TEXT,
+                    email TEXT,
+                    start_date TEXT,
+                    course TEXT,
+                    intent TEXT,
+                    response TEXT,
+                    call_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+
+            # Add table for call tracking
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS call_logs (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    call_sid TEXT UNIQUE,
+                    to_number TEXT,
+                    from_number TEXT,
+                    status TEXT,
+                    direction TEXT,
+                    duration INTEGER,
+                    start_time TIMESTAMP,
+                    end_time TIMESTAMP,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+
+        _initialized.add(key)
+        logger.info(f"Database schema ready: {db_file}")
+        return True
+
+
+def save_response(intent, field, value, db_file=DB_FILE):
+    with sqlite3.connect(db_file) as conn:
+        conn.execute("INSERT INTO users (intent, response) VALUES (?, ?)", (intent, f"{field}:{value}"))
+
+
+def save_call_log(call_sid, to_number, from_number, status, direction, duration=None, start_time=None, end_time=None,
+                  db_file=DB_FILE):
+    with sqlite3.connect(db_file) as conn:
+        conn.execute("""
+            INSERT OR REPLACE INTO call_logs
+            (call_sid, to_number, from_number, status, direction, duration, start_time, end_time)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """, (call_sid, to_number, from_number, status, direction, duration, start_time, end_time))
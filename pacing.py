@@ -0,0 +1,310 @@
+import math
+import threading
+import time
+from collections import deque
+import logging
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Twilio CallStatus values, grouped by what they mean for pacing
+RINGING_STATUSES = ('queued', 'initiated', 'ringing')
+ANSWERED_STATUS = 'in-progress'
+COMPLETED_STATUS = 'completed'
+UNANSWERED_STATUSES = ('busy', 'no-answer', 'failed', 'canceled')
+
+
+def _overflow_probability(dials, answer_rate, slots):
+    """Chance that more than `slots` of `dials` calls answer, each with probability answer_rate"""
+    if answer_rate >= 1.0:
+        return 1.0 if dials > slots else 0.0
+    # Walk the binomial pmf term by term: P(k+1) = P(k) * (n-k)/(k+1) * p/(1-p)
+    term = (1 - answer_rate) ** dials
+    within = 0.0
+    for k in range(min(slots, dials) + 1):
+        within += term
+        term *= (dials - k) / (k + 1) * answer_rate / (1 - answer_rate)
+    return max(0.0, 1.0 - within)
+
+
+class AdaptivePacingController:
+    """
+    Pace an outbound campaign so answered calls keep capacity busy without overflowing it.
+
+    Status callbacks feed rolling answer-rate, ring-time and handle-time
+    statistics. From those the controller works out how much agent/IVR
+    capacity will be free by the time a new dial is answered, and keeps as
+    many calls ringing as it can while the chance of more answers than free
+    slots stays under max_overflow_rate.
+
+    State lives in process memory, so status callbacks must reach the same
+    process that dialed: run campaigns on a single worker. Calls whose final
+    callback never arrives are aged out after ring_timeout/live_timeout.
+    """
+
+    def __init__(self, twilio_handler=None, capacity=5, max_concurrency=20, max_overflow_rate=0.05,
+                 window=50, prior_answer_rate=0.5, prior_weight=10, ring_timeout=90.0,
+                 live_timeout=3600.0, retry_delay=5.0, clock=time.monotonic):
+        """
+        Args:
+            twilio_handler (TwilioHandler): Used to place calls (optional until dialing)
+            capacity (int): Concurrent answered calls the agents/IVR can handle
+            max_concurrency (int): Hard cap on calls ringing at once
+            max_overflow_rate (float): Acceptable chance that answered calls exceed free capacity
+            window (int): Number of recent calls the rolling statistics cover
+            prior_answer_rate (float): Answer rate assumed before data comes in
+            prior_weight (int): How many calls' worth of weight the prior carries
+            ring_timeout (float): Seconds before a call with no answer/final status stops holding a ring slot
+            live_timeout (float): Seconds before an answered call with no completed status frees its capacity
+            retry_delay (float): Seconds to wait before dialing again after a Twilio API error
+            clock (callable): Time source, replaceable for simulation
+        """
+        self.twilio_handler = twilio_handler
+        self.capacity = capacity
+        self.max_concurrency = max_concurrency
+        self.max_overflow_rate = max_overflow_rate
+        self.prior_answer_rate = prior_answer_rate
+        self.prior_weight = prior_weight
+        self.ring_timeout = ring_timeout
+        self.live_timeout = live_timeout
+        self.retry_delay = retry_delay
+        self.clock = clock
+
+        self.queue = deque()
+        self.ringing = {}
+        self.live = {}
+        self.outcomes = deque(maxlen=window)
+        self.ring_times = deque(maxlen=window)
+        self.handle_times = deque(maxlen=window)
+
+        self.dialed = 0
+        self.answered = 0
+        self.overflows = 0
+        self.expired = 0
+        self.dial_errors = 0
+        self._overflowed = set()
+        self._dialing = 0
+        self._retry_at = None
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._worker = None
+
+    # === Statistics ===
+    def _answer_rate(self):
+        answered = sum(self.outcomes)
+        # Blend with the prior so a handful of early outcomes can't swing pacing wildly
+        return ((answered + self.prior_answer_rate * self.prior_weight) /
+                (len(self.outcomes) + self.prior_weight))
+
+    def _avg(self, values):
+        return sum(values) / len(values) if values else None
+
+    def _target_ringing(self):
+        free = self.capacity - len(self.live)
+        aht = self._avg(self.handle_times)
+        ring_time = self._avg(self.ring_times)
+        if aht and ring_time:
+            # Live calls expected to finish before a dial placed now is answered
+            free += len(self.live) * min(1.0, ring_time / aht)
+        slots = math.floor(free)
+        if slots <= 0:
+            return 0
+        answer_rate = self._answer_rate()
+        # Grow the ring count while P(answers > free slots) stays acceptable
+        ringing = min(slots, self.max_concurrency)
+        while ringing < self.max_concurrency and _overflow_probability(ringing + 1, answer_rate, slots) <= self.max_overflow_rate:
+            ringing += 1
+        return ringing
+
+    def _expire(self, now):
+        """Drop calls whose final status callback was lost so they stop holding slots"""
+        expired = 0
+        for calls, timeout in ((self.ringing, self.ring_timeout), (self.live, self.live_timeout)):
+            stale = [sid for sid, since in calls.items() if now - since > timeout]
+            for sid in stale:
+                del calls[sid]
+                self._overflowed.discard(sid)
+            expired += len(stale)
+        if expired:
+            self.expired += expired
+            logger.warning(f"Campaign expired {expired} calls with no final status")
+
+    def is_idle(self):
+        """True once nothing is queued, dialing, ringing or live, i.e. the campaign is over"""
+        with self._lock:
+            self._expire(self.clock())
+            return not (self.queue or self.ringing or self.live or self._dialing or self._worker)
+
+    def target_concurrency(self):
+        """Number of calls that should be ringing right now"""
+        with self._lock:
+            return self._target_ringing()
+
+    # === Status Events ===
+    def record_status(self, call_sid, status, duration=None):
+        """
+        Feed a Twilio call status callback into the controller
+
+        Args:
+            call_sid (str): The call SID from the callback
+            status (str): Twilio CallStatus
+            duration (str|int): CallDuration in seconds, sent with completed calls (optional)
+
+        Returns:
+            bool: True if the call belongs to this campaign
+        """
+        now = self.clock()
+        with self._lock:
+            if call_sid in self.ringing:
+                dialed_at = self.ringing[call_sid]
+                if status in RINGING_STATUSES:
+                    return True
+                del self.ringing[call_sid]
+                self.ring_times.append(now - dialed_at)
+                if status == ANSWERED_STATUS or (status == COMPLETED_STATUS and duration and int(duration) > 0):
+                    self.outcomes.append(True)
+                    self.answered += 1
+                    if len(self.live) >= self.capacity:
+                        self.overflows += 1
+                        self._overflowed.add(call_sid)
+                    if status == ANSWERED_STATUS:
+                        self.live[call_sid] = now
+                    elif call_sid in self._overflowed:
+                        self._overflowed.discard(call_sid)
+                    else:
+                        # Answered and finished before we saw the answered callback
+                        self.handle_times.append(int(duration))
+                else:
+                    self.outcomes.append(False)
+                return True
+
+            if call_sid in self.live:
+                if status == COMPLETED_STATUS or status in UNANSWERED_STATUSES:
+                    answered_at = self.live.pop(call_sid)
+                    if call_sid in self._overflowed:
+                        # Dropped for lack of capacity, not a real handle time
+                        self._overflowed.discard(call_sid)
+                    else:
+                        handle_time = int(duration) if duration else now - answered_at
+                        self.handle_times.append(handle_time)
+                return True
+
+        return False
+
+    # === Dialing ===
+    def add_numbers(self, numbers):
+        """Queue phone numbers for the campaign"""
+        with self._lock:
+            self.queue.extend(numbers)
+            return len(self.queue)
+
+    def pump(self):
+        """
+        Dial queued numbers until the target number of calls are ringing
+
+        Returns:
+            list: Call information for each call placed
+        """
+        if not self.twilio_handler:
+            return []
+
+        with self._lock:
+            now = self.clock()
+            if self._retry_at is not None and now < self._retry_at:
+                return []
+            self._retry_at = None
+            self._expire(now)
+            count = max(0, self._target_ringing() - len(self.ringing) - self._dialing)
+            numbers = [self.queue.popleft() for _ in range(min(count, len(self.queue)))]
+            self._dialing += len(numbers)
+
+        placed = []
+        for i, number in enumerate(numbers):
+            # Dial outside the lock so status callbacks aren't blocked on the Twilio API
+            try:
+                call_info = self.twilio_handler.make_outbound_call(number)
+            except Exception as e:
+                # An API error says nothing about whether people answer: requeue
+                # the rest of this batch and back off instead of counting a miss
+                logger.error(f"Campaign dial to {number} failed, retrying in {self.retry_delay}s: {e}")
+                with self._lock:
+                    self._dialing -= len(numbers) - i
+                    self.dial_errors += 1
+                    self.queue.extendleft(reversed(numbers[i:]))
+                    self._retry_at = self.clock() + self.retry_delay
+                break
+            with self._lock:
+                self._dialing -= 1
+                self.dialed += 1
+                self.ringing[call_info['sid']] = self.clock()
+            placed.append(call_info)
+
+        if placed:
+            logger.debug(f"Campaign dialed {len(placed)} calls")
+        return placed
+
+    # === Background Dialing ===
+    def start(self, on_dial=None, interval=1.0):
+        """
+        Dial the queue from a background thread until it is empty
+
+        Keeps Twilio API calls out of webhook response paths. The thread
+        re-pumps every interval (so API-error retries and expired calls are
+        picked up without new callbacks) and immediately on notify().
+
+        Args:
+            on_dial (callable): Called with the list of calls placed by each pump (optional)
+            interval (float): Seconds between pumps when nothing calls notify()
+        """
+        with self._lock:
+            if self._worker is not None:
+                self._wakeup.set()
+                return
+            self._worker = threading.Thread(target=self._run, args=(on_dial, interval),
+                                            name="campaign-pacer", daemon=True)
+            self._worker.start()
+
+    def notify(self):
+        """Wake the background dialer, e.g. after a status callback freed capacity"""
+        self._wakeup.set()
+
+    def _run(self, on_dial, interval):
+        while True:
+            self._wakeup.clear()
+            try:
+                placed = self.pump()
+                if placed and on_dial:
+                    on_dial(placed)
+            except Exception as e:
+                logger.error(f"Campaign pacing error: {e}")
+            with self._lock:
+                if not self.queue:
+                    self._worker = None
+                    return
+            self._wakeup.wait(interval)
+
+    def get_stats(self):
+        """
+        Get the campaign's current pacing state
+
+        Returns:
+            dict: Rolling statistics, call counts and target concurrency
+        """
+        with self._lock:
+            self._expire(self.clock())
+            return {
+                'queued': len(self.queue),
+                'ringing': len(self.ringing) + self._dialing,
+                'live': len(self.live),
+                'capacity': self.capacity,
+                'target_concurrency': self._target_ringing(),
+                'answer_rate': self._answer_rate(),
+                'avg_handle_time': self._avg(self.handle_times),
+                'avg_ring_time': self._avg(self.ring_times),
+                'dialed': self.dialed,
+                'answered': self.answered,
+                'overflows': self.overflows,
+                'expired': self.expired,
+                'dial_errors': self.dial_errors,
+            }
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+Simulate an outbound campaign to compare adaptive pacing with fixed-rate dialing
+"""
+
+import heapq
+import random
+import argparse
+import logging
+from collections import deque
+from pacing import AdaptivePacingController
+
+
+class SimulatedCampaign:
+    """
+    Synthetic Twilio: placed calls ring, then answer or fail, and send status events
+
+    Stands in for TwilioHandler so a dialer can be driven by a synthetic
+    status stream. The answer rate can change mid-run to mimic the shifting
+    answer rates seen across a real calling day.
+    """
+
+    def __init__(self, capacity, answer_rates, seed=0, mean_handle_time=90.0, ring_time=(5.0, 25.0)):
+        self.capacity = capacity
+        self.answer_rates = answer_rates
+        self.mean_handle_time = mean_handle_time
+        self.ring_time = ring_time
+        self.random = random.Random(seed)
+        self.now = 0.0
+        self.events = []
+        self.live = set()
+        self._next_sid = 0
+        self.connected = 0
+        self.overflows = 0
+        self.busy_seconds = 0.0
+
+    def answer_rate(self):
+        # answer_rates is a list of (start_time, rate) steps
+        rate = self.answer_rates[0][1]
+        for start, step_rate in self.answer_rates:
+            if self.now >= start:
+                rate = step_rate
+        return rate
+
+    def make_outbound_call(self, to_number, webhook_url=None):
+        self._next_sid += 1
+        sid = f"CA{self._next_sid:06d}"
+        ring = self.random.uniform(*self.ring_time)
+        if self.random.random() < self.answer_rate():
+            heapq.heappush(self.events, (self.now + ring, sid, 'in-progress'))
+        else:
+            status = self.random.choice(['busy', 'no-answer', 'no-answer', 'failed'])
+            heapq.heappush(self.events, (self.now + ring, sid, status))
+        return {'sid': sid, 'status': 'queued', 'to': to_number, 'from': '+10000000000'}
+
+    def advance(self, until):
+        """
+        Move the clock forward, yielding status events as they happen
+
+        Yields:
+            tuple: (call_sid, status, duration) for each status callback
+        """
+        while self.events and self.events[0][0] <= until:
+            at, sid, status = heapq.heappop(self.events)
+            self.busy_seconds += len(self.live) * (at - self.now)
+            self.now = at
+            if status == 'in-progress':
+                if len(self.live) >= self.capacity:
+                    # Nobody free to take the call: caller hears dead air and hangs up
+                    self.overflows += 1
+                    heapq.heappush(self.events, (self.now + 1.0, sid, 'abandoned'))
+                else:
+                    self.live.add(sid)
+                    self.connected += 1
+                    handle = self.random.expovariate(1.0 / self.mean_handle_time)
+                    heapq.heappush(self.events, (self.now + handle, sid, 'completed'))
+                yield sid, 'in-progress', None
+            elif status == 'abandoned':
+                yield sid, 'completed', 1
+            elif status == 'completed':
+                self.live.discard(sid)
+                yield sid, 'completed', None
+            else:
+                yield sid, status, 0
+        self.busy_seconds += len(self.live) * (until - self.now)
+        self.now = until
+
+
+class FixedRateDialer:
+    """Baseline dialer that keeps a fixed number of campaign calls in progress"""
+
+    def __init__(self, twilio_handler, concurrency):
+        self.twilio_handler = twilio_handler
+        self.concurrency = concurrency
+        self.queue = deque()
+        self.active = set()
+
+    def add_numbers(self, numbers):
+        self.queue.extend(numbers)
+
+    def record_status(self, call_sid, status, duration=None):
+        if status in ('completed', 'busy', 'no-answer', 'failed', 'canceled'):
+            self.active.discard(call_sid)
+
+    def pump(self):
+        placed = []
+        while self.queue and len(self.active) < self.concurrency:
+            call_info = self.twilio_handler.make_outbound_call(self.queue.popleft())
+            self.active.add(call_info['sid'])
+            placed.append(call_info)
+        return placed
+
+
+def run(dialer_factory, args):
+    """
+    Run one campaign simulation
+
+    Args:
+        dialer_factory (callable): Builds a dialer from (campaign, clock)
+        args: Parsed command line arguments
+
+    Returns:
+        dict: Connected calls, overflows and agent utilization
+    """
+    campaign = SimulatedCampaign(
+        capacity=args.capacity,
+        answer_rates=[(0, args.answer_rate), (args.duration / 2, args.late_answer_rate)],
+        seed=args.seed,
+        mean_handle_time=args.handle_time
+    )
+    dialer = dialer_factory(campaign, lambda: campaign.now)
+    dialer.add_numbers(f"+1555{i:07d}" for i in range(args.numbers))
+    dialer.pump()
+
+    # Status callbacks arrive as events; also re-pump on a timer like a webhook-driven app would
+    tick = 1.0
+    while campaign.now < args.duration:
+        for sid, status, duration in campaign.advance(campaign.now + tick):
+            dialer.record_status(sid, status, duration)
+        dialer.pump()
+
+    return {
+        'connected': campaign.connected,
+        'overflows': campaign.overflows,
+        'utilization': campaign.busy_seconds / (args.capacity * args.duration),
+        'dialed': campaign._next_sid,
+    }
+
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description="Compare adaptive pacing with fixed-rate dialing")
+    parser.add_argument("--capacity", type=int, default=5, help="concurrent calls agents/IVR can take")
+    parser.add_argument("--duration", type=float, default=4 * 3600, help="simulated seconds")
+    parser.add_argument("--answer-rate", type=float, default=0.5, help="answer rate in the first half")
+    parser.add_argument("--late-answer-rate", type=float, default=0.2, help="answer rate in the second half")
+    parser.add_argument("--handle-time", type=float, default=90.0, help="mean handle time in seconds")
+    parser.add_argument("--numbers", type=int, default=100000, help="numbers in the calling list")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    # Keep per-dial controller logging out of the results table
+    logging.getLogger("pacing").setLevel(logging.WARNING)
+
+    dialers = [
+        ("adaptive", lambda campaign, clock: AdaptivePacingController(
+            campaign, capacity=args.capacity, clock=clock)),
+        (f"fixed x{args.capacity}", lambda campaign, clock: FixedRateDialer(
+            campaign, args.capacity)),
+        (f"fixed x{args.capacity * 2}", lambda campaign, clock: FixedRateDialer(
+            campaign, args.capacity * 2)),
+        (f"fixed x{args.capacity * 4}", lambda campaign, clock: FixedRateDialer(
+            campaign, args.capacity * 4)),
+    ]
+
+    print("=== Pacing Simulation ===")
+    print(f"Capacity {args.capacity}, answer rate {args.answer_rate} then {args.late_answer_rate}, "
+          f"mean handle time {args.handle_time:.0f}s over {args.duration / 3600:.1f}h")
+    print()
+    print(f"{'dialer':>12} {'dialed':>8} {'connected':>10} {'overflows':>10} {'utilization':>12}")
+    for name, factory in dialers:
+        result = run(factory, args)
+        print(f"{name:>12} {result['dialed']:>8} {result['connected']:>10} "
+              f"{result['overflows']:>10} {result['utilization']:>11.1%}")
+
+
+if __name__ == "__main__":
+    main()
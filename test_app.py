@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Tests for app.py request handling on freshly created apps
+"""
+
+import os
+import time
+import shutil
+import tempfile
+import threading
+import unittest
+import app
+from test_pacing import FakeTwilioHandler
+
+
+class AppTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.app = app.create_app({"DB_FILE": os.path.join(self.tmp_dir, "test.db"), "TESTING": True})
+        self.client = self.app.test_client()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def request_with_timeout(self, method, *args, **kwargs):
+        """Make a request in a thread so a deadlock fails the test instead of hanging it"""
+        result = {}
+        thread = threading.Thread(
+            target=lambda: result.setdefault('response', getattr(self.client, method)(*args, **kwargs)),
+            daemon=True
+        )
+        thread.start()
+        thread.join(timeout=5)
+        self.assertFalse(thread.is_alive(), f"{method.upper()} {args[0]} did not return")
+        return result['response']
+
+    def test_call_status_as_first_request(self):
+        response = self.request_with_timeout('post', '/call-status', data={
+            'CallSid': 'CA123',
+            'CallStatus': 'completed',
+            'To': '+10000000000',
+            'From': '+10000000001',
+            'CallDuration': '12',
+        })
+        self.assertEqual(response.status_code, 200)
+        # With no campaign running the webhook must not build the dialer or load twilio.rest
+        self.assertNotIn('pacing_controller', self.app.extensions)
+        self.assertNotIn('twilio_handler', self.app.extensions)
+
+    def test_campaign_stats_before_any_campaign(self):
+        response = self.request_with_timeout('get', '/campaign')
+        self.assertEqual(response.status_code, 404)
+
+    def test_campaign_dials_in_background_and_tracks_status(self):
+        handler = FakeTwilioHandler()
+        self.app.extensions['twilio_handler'] = handler
+        response = self.request_with_timeout('post', '/campaign', json={'numbers': ['+11', '+12']})
+        self.assertEqual(response.status_code, 200)
+
+        deadline = time.monotonic() + 5
+        while len(handler.calls) < 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(handler.calls, ['+11', '+12'])
+
+        self.request_with_timeout('post', '/call-status', data={'CallSid': 'CA1', 'CallStatus': 'in-progress'})
+        stats = self.request_with_timeout('get', '/campaign').get_json()
+        self.assertEqual(stats['answered'], 1)
+        self.assertEqual(stats['live'], 1)
+
+        # A second campaign while calls are still tracked keeps the same controller
+        controller = self.app.extensions['pacing_controller']
+        self.request_with_timeout('post', '/campaign', json={'numbers': ['+13']})
+        self.assertIs(self.app.extensions['pacing_controller'], controller)
+
+    def test_new_campaign_after_last_one_finished_starts_fresh(self):
+        handler = FakeTwilioHandler()
+        self.app.extensions['twilio_handler'] = handler
+        self.request_with_timeout('post', '/campaign', json={'numbers': ['+11']})
+        controller = self.app.extensions['pacing_controller']
+        deadline = time.monotonic() + 5
+        while not handler.calls and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.request_with_timeout('post', '/call-status', data={'CallSid': 'CA1', 'CallStatus': 'busy'})
+        while not controller.is_idle() and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        stats = self.request_with_timeout('post', '/campaign', json={'numbers': ['+12']}).get_json()
+        self.assertIsNot(self.app.extensions['pacing_controller'], controller)
+        self.assertEqual(stats['queued'] + stats['ringing'], 1)
+        self.assertEqual(stats['dialed'] + stats['queued'], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the adaptive pacing controller
+"""
+
+import math
+import unittest
+from pacing import AdaptivePacingController, _overflow_probability
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeTwilioHandler:
+    """Stands in for TwilioHandler.make_outbound_call; can fail the next N dials"""
+
+    def __init__(self):
+        self.calls = []
+        self.fail_next = 0
+
+    def make_outbound_call(self, to_number, webhook_url=None):
+        if self.fail_next:
+            self.fail_next -= 1
+            raise RuntimeError("Twilio API unavailable")
+        sid = f"CA{len(self.calls) + 1}"
+        self.calls.append(to_number)
+        return {'sid': sid, 'status': 'queued', 'to': to_number, 'from': '+10000000000'}
+
+
+def binomial_tail(dials, answer_rate, slots):
+    return 1 - sum(math.comb(dials, k) * answer_rate ** k * (1 - answer_rate) ** (dials - k)
+                   for k in range(min(slots, dials) + 1))
+
+
+class OverflowProbabilityTest(unittest.TestCase):
+    def test_matches_binomial_tail(self):
+        for dials, answer_rate, slots in [(10, 0.5, 5), (3, 0.2, 1), (20, 0.9, 5), (7, 0.3, 7), (12, 0.05, 0)]:
+            self.assertAlmostEqual(_overflow_probability(dials, answer_rate, slots),
+                                   max(0.0, binomial_tail(dials, answer_rate, slots)))
+
+    def test_certain_answers(self):
+        self.assertEqual(_overflow_probability(4, 1.0, 5), 0.0)
+        self.assertEqual(_overflow_probability(6, 1.0, 5), 1.0)
+
+
+class PacingControllerTest(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.handler = FakeTwilioHandler()
+        self.controller = AdaptivePacingController(self.handler, capacity=5, clock=self.clock)
+
+    def test_target_is_largest_ring_count_under_overflow_limit(self):
+        target = self.controller.target_concurrency()
+        self.assertGreater(target, 5)
+        self.assertLessEqual(_overflow_probability(target, 0.5, 5), 0.05)
+        self.assertGreater(_overflow_probability(target + 1, 0.5, 5), 0.05)
+
+    def test_target_never_exceeds_max_concurrency(self):
+        controller = AdaptivePacingController(self.handler, capacity=40, max_concurrency=20, clock=self.clock)
+        self.assertEqual(controller.target_concurrency(), 20)
+        controller.add_numbers([f"+1{i}" for i in range(100)])
+        self.assertEqual(len(controller.pump()), 20)
+
+    def test_no_dials_when_capacity_is_full(self):
+        self.controller.add_numbers([f"+1{i}" for i in range(20)])
+        placed = self.controller.pump()
+        for call_info in placed[:5]:
+            self.controller.record_status(call_info['sid'], 'in-progress')
+        self.assertEqual(self.controller.target_concurrency(), 0)
+
+    def test_answered_then_completed_records_handle_time(self):
+        self.controller.add_numbers(["+11"])
+        sid = self.controller.pump()[0]['sid']
+        self.clock.now = 12.0
+        self.assertTrue(self.controller.record_status(sid, 'ringing'))
+        self.assertTrue(self.controller.record_status(sid, 'in-progress'))
+        self.clock.now = 50.0
+        self.assertTrue(self.controller.record_status(sid, 'completed', '42'))
+        stats = self.controller.get_stats()
+        self.assertEqual(stats['answered'], 1)
+        self.assertEqual(stats['live'], 0)
+        self.assertEqual(stats['avg_ring_time'], 12.0)
+        self.assertEqual(stats['avg_handle_time'], 42.0)
+        self.assertEqual(list(self.controller.outcomes), [True])
+
+    def test_completed_with_duration_without_answered_callback(self):
+        self.controller.add_numbers(["+11"])
+        sid = self.controller.pump()[0]['sid']
+        self.controller.record_status(sid, 'completed', '30')
+        self.assertEqual(self.controller.answered, 1)
+        self.assertEqual(list(self.controller.handle_times), [30])
+
+    def test_unanswered_outcomes(self):
+        self.controller.add_numbers(["+11", "+12"])
+        first, second = [call_info['sid'] for call_info in self.controller.pump()[:2]]
+        self.controller.record_status(first, 'busy', '0')
+        self.controller.record_status(second, 'completed', '0')
+        self.assertEqual(list(self.controller.outcomes), [False, False])
+        self.assertEqual(self.controller.answered, 0)
+
+    def test_unknown_call_is_ignored(self):
+        self.assertFalse(self.controller.record_status("CA_INBOUND", 'completed', '60'))
+
+    def test_overflowed_call_does_not_count_as_handle_time(self):
+        controller = AdaptivePacingController(self.handler, capacity=1, max_overflow_rate=0.5, clock=self.clock)
+        controller.add_numbers(["+11", "+12"])
+        first, second = [call_info['sid'] for call_info in controller.pump()[:2]]
+        controller.record_status(first, 'in-progress')
+        controller.record_status(second, 'in-progress')
+        self.assertEqual(controller.overflows, 1)
+        controller.record_status(second, 'completed', '1')
+        controller.record_status(first, 'completed', '60')
+        self.assertEqual(list(controller.handle_times), [60])
+
+    def test_lost_final_callback_expires_ring_slot(self):
+        self.controller.add_numbers([f"+1{i}" for i in range(50)])
+        first_batch = len(self.controller.pump())
+        self.assertEqual(self.controller.pump(), [])
+        self.clock.now = self.controller.ring_timeout + 1
+        self.assertEqual(len(self.controller.pump()), first_batch)
+        self.assertEqual(self.controller.expired, first_batch)
+
+    def test_api_error_requeues_and_backs_off(self):
+        self.controller.add_numbers(["+11", "+12", "+13"])
+        self.handler.fail_next = 1
+        self.assertEqual(self.controller.pump(), [])
+        self.assertEqual(list(self.controller.queue), ["+11", "+12", "+13"])
+        self.assertEqual(self.controller.dial_errors, 1)
+        self.assertEqual(len(self.controller.outcomes), 0)
+        self.assertEqual(self.controller.get_stats()['ringing'], 0)
+
+        self.clock.now = self.controller.retry_delay / 2
+        self.assertEqual(self.controller.pump(), [])
+        self.clock.now = self.controller.retry_delay
+        self.assertEqual([call_info['to'] for call_info in self.controller.pump()], ["+11", "+12", "+13"])
+
+
+if __name__ == "__main__":
+    unittest.main()
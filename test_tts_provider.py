@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the TTS fallback chain and circuit breaker
+"""
+
+import os
+import time
+import shutil
+import tempfile
+import threading
+import unittest
+from tts_provider import (CircuitBreaker, ElevenLabsProvider, TTSFallbackChain,
+                          TIER_CACHE, TIER_PRIMARY, TIER_GENERIC, TIER_SAY)
+
+
+class FakeProvider:
+    """Stands in for ElevenLabsProvider; can be slow, fail, or hang until released"""
+
+    voice = "fake-voice"
+
+    def __init__(self, delay=0.0, fail=False, hang=False):
+        self.delay = delay
+        self.fail = fail
+        self.release = threading.Event()
+        if not hang:
+            self.release.set()
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def synthesize(self, text):
+        with self._lock:
+            self.calls.append(text)
+        self.release.wait()
+        time.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError("ElevenLabs unavailable")
+        return b"mp3:" + text.encode("utf-8")
+
+
+class TTSFallbackChainTest(unittest.TestCase):
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+        self.chains = []
+
+    def tearDown(self):
+        for chain in self.chains:
+            chain.provider.release.set()
+            chain._executor.shutdown(wait=True)
+        shutil.rmtree(self.cache_dir)
+
+    def make_chain(self, provider, **kwargs):
+        kwargs.setdefault('latency_budget', 0.5)
+        chain = TTSFallbackChain(provider=provider, cache_dir=self.cache_dir, **kwargs)
+        self.chains.append(chain)
+        return chain
+
+    def write_cache(self, chain, text):
+        with open(chain._cache_path(text), "wb") as f:
+            f.write(b"cached")
+
+    def test_cache_hit_skips_provider(self):
+        provider = FakeProvider()
+        chain = self.make_chain(provider)
+        self.write_cache(chain, "Hello")
+        result = chain.synthesize("Hello")
+        self.assertEqual(result.tier, TIER_CACHE)
+        self.assertEqual(result.audio_url, chain._cache_url("Hello"))
+        self.assertEqual(provider.calls, [])
+
+    def test_primary_within_budget_writes_cache_atomically(self):
+        chain = self.make_chain(FakeProvider())
+        result = chain.synthesize("Hello")
+        self.assertEqual(result.tier, TIER_PRIMARY)
+        with open(chain._cache_path("Hello"), "rb") as f:
+            self.assertEqual(f.read(), b"mp3:Hello")
+        self.assertEqual([name for name in os.listdir(self.cache_dir) if name.endswith(".tmp")], [])
+        self.assertEqual(chain.synthesize("Hello").tier, TIER_CACHE)
+        self.assertEqual(chain.breaker.state, 'closed')
+
+    def test_timeout_falls_back_to_generic_then_say(self):
+        chain = self.make_chain(FakeProvider(hang=True), latency_budget=0.02)
+        self.write_cache(chain, "Generic prompt")
+        result = chain.synthesize("Personal prompt", generic_text="Generic prompt")
+        self.assertEqual(result.tier, TIER_GENERIC)
+        self.assertEqual(result.audio_url, chain._cache_url("Generic prompt"))
+
+        result = chain.synthesize("Other prompt", generic_text="Uncached generic")
+        self.assertEqual(result.tier, TIER_SAY)
+        self.assertIsNone(result.audio_url)
+        self.assertEqual(result.text, "Other prompt")
+        self.assertEqual(chain.get_metrics()['primary_timeouts'], 2)
+
+    def test_joins_inflight_synthesis(self):
+        provider = FakeProvider(delay=0.1)
+        chain = self.make_chain(provider)
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(chain.synthesize("Same"))) for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(provider.calls, ["Same"])
+        self.assertEqual(sorted(result.tier for result in results), [TIER_PRIMARY] * 3)
+
+    def test_breaker_opens_then_half_opens(self):
+        provider = FakeProvider(fail=True)
+        chain = self.make_chain(provider, breaker=CircuitBreaker(failure_threshold=3, reset_timeout=0.1))
+        for i in range(3):
+            self.assertEqual(chain.synthesize(f"Prompt {i}").tier, TIER_SAY)
+        self.assertEqual(chain.breaker.state, 'open')
+
+        chain.synthesize("While open")
+        self.assertEqual(len(provider.calls), 3)
+
+        time.sleep(0.15)
+        self.assertEqual(chain.breaker.state, 'half-open')
+        provider.fail = False
+        self.assertEqual(chain.synthesize("Probe").tier, TIER_PRIMARY)
+        self.assertEqual(chain.breaker.state, 'closed')
+
+    def test_half_open_probe_not_spent_on_shed_request(self):
+        provider = FakeProvider(hang=True)
+        chain = self.make_chain(provider, latency_budget=0.02, max_inflight=1,
+                                breaker=CircuitBreaker(failure_threshold=1, reset_timeout=0.05))
+        chain.synthesize("Hung")
+        self.assertEqual(chain.breaker.state, 'open')
+        time.sleep(0.06)
+        # The only in-flight slot is still taken, so this turn is shed without using the probe
+        self.assertEqual(chain.synthesize("Shed").tier, TIER_SAY)
+        self.assertEqual(chain.breaker.state, 'half-open')
+        self.assertEqual(chain.get_metrics()['primary_shed'], 1)
+
+    def test_sheds_beyond_max_inflight(self):
+        provider = FakeProvider(hang=True)
+        chain = self.make_chain(provider, latency_budget=0.02, max_inflight=2,
+                                breaker=CircuitBreaker(failure_threshold=10))
+        for i in range(3):
+            self.assertEqual(chain.synthesize(f"Prompt {i}").tier, TIER_SAY)
+        self.assertEqual(provider.calls, ["Prompt 0", "Prompt 1"])
+        self.assertEqual(chain.get_metrics()['primary_shed'], 1)
+
+    def test_queued_late_success_does_not_reset_breaker(self):
+        # One worker: later prompts wait in the executor queue and miss the budget
+        chain = self.make_chain(FakeProvider(delay=0.06), latency_budget=0.1, max_workers=1,
+                                breaker=CircuitBreaker(failure_threshold=3, reset_timeout=60))
+        threads = [threading.Thread(target=chain.synthesize, args=(f"Prompt {i}",)) for i in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        chain._executor.shutdown(wait=True)
+        self.assertEqual(chain.breaker.state, 'open')
+        self.assertGreaterEqual(chain.breaker.failures, 3)
+
+    def test_warm_up_loads_provider(self):
+        provider = FakeProvider()
+        provider.load = lambda: provider.calls.append("load")
+        self.make_chain(provider).warm_up()
+        self.assertEqual(provider.calls, ["load"])
+
+    def test_uncacheable_prompt_is_never_synthesized(self):
+        provider = FakeProvider()
+        chain = self.make_chain(provider)
+        result = chain.synthesize("Register for heavy vehicle?", cacheable=False)
+        self.assertEqual(result.tier, TIER_SAY)
+        self.assertNotIn("Register for heavy vehicle?", provider.calls)
+        self.assertFalse(os.path.exists(chain._cache_path("Register for heavy vehicle?")))
+
+
+class ElevenLabsProviderTest(unittest.TestCase):
+    def test_converts_with_voice_id(self):
+        requests = []
+
+        class FakeTextToSpeech:
+            def convert(self, voice_id, text):
+                requests.append((voice_id, text))
+                return iter([b"ab", b"cd"])
+
+        class FakeClient:
+            text_to_speech = FakeTextToSpeech()
+
+        provider = ElevenLabsProvider(api_key="test")
+        provider._client = FakeClient()
+        self.assertEqual(provider.synthesize("Hello"), b"abcd")
+        self.assertEqual(requests, [(ElevenLabsProvider.RACHEL_VOICE_ID, "Hello")])
+
+    def test_missing_api_key_fails_without_calling_api(self):
+        provider = ElevenLabsProvider(api_key=None)
+        provider.api_key = None
+        provider._client = object()
+        with self.assertRaises(ValueError):
+            provider.synthesize("Hello")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,307 @@
+import os
+import hashlib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+import logging
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Tiers a prompt can be served from, fastest/best first
+TIER_CACHE = 'cache'
+TIER_PRIMARY = 'primary'
+TIER_GENERIC = 'generic'
+TIER_SAY = 'say'
+TIERS = (TIER_CACHE, TIER_PRIMARY, TIER_GENERIC, TIER_SAY)
+
+
+class TTSResult:
+    """Outcome of a synthesis request: either an audio URL to <Play> or text to <Say>"""
+
+    def __init__(self, tier, text, audio_url=None):
+        self.tier = tier
+        self.text = text
+        self.audio_url = audio_url
+
+    def apply(self, verb):
+        """
+        Render this result onto a TwiML verb (VoiceResponse or Gather)
+
+        Args:
+            verb: The TwiML element to append <Play> or <Say> to
+        """
+        if self.audio_url:
+            verb.play(url=self.audio_url)
+        else:
+            verb.say(self.text, voice='alice')
+        return verb
+
+
+class CircuitBreaker:
+    """Stops calling a failing provider until a cooldown has passed"""
+
+    def __init__(self, failure_threshold=3, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._state()
+
+    def _state(self):
+        if self.opened_at is None:
+            return 'closed'
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return 'half-open'
+        return 'open'
+
+    def allow_request(self):
+        """Return True if the provider may be called right now"""
+        with self._lock:
+            state = self._state()
+            if state == 'half-open':
+                # Let a single probe through, then wait out another cooldown
+                self.opened_at = time.monotonic()
+                return True
+            return state == 'closed'
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.failures >= self.failure_threshold:
+                if self.opened_at is None:
+                    logger.warning("TTS circuit breaker opened")
+                self.opened_at = time.monotonic()
+
+
+class ElevenLabsProvider:
+    """Primary TTS provider backed by the ElevenLabs API"""
+
+    # ElevenLabs premade "Rachel" voice; the text_to_speech API takes voice IDs, not names
+    RACHEL_VOICE_ID = "21m00Tcm4TlvDq8ikWAM"
+
+    def __init__(self, api_key=None, voice=RACHEL_VOICE_ID, timeout=10.0):
+        self.api_key = api_key or os.getenv("ELEVENLABS_API_KEY")
+        self.voice = voice
+        # The SDK waits up to 240s by default, which would pin a worker thread
+        self.timeout = timeout
+        self._client = None
+        self._load_lock = threading.Lock()
+
+    def load(self):
+        """
+        Import the ElevenLabs SDK and build the client
+
+        The import alone takes a noticeable fraction of a second, so callers
+        can run this ahead of the first synthesis to keep it off a turn's
+        latency budget.
+
+        Returns:
+            ElevenLabs: The SDK client
+        """
+        with self._load_lock:
+            if self._client is None:
+                from elevenlabs import ElevenLabs
+                self._client = ElevenLabs(api_key=self.api_key, timeout=self.timeout)
+            return self._client
+
+    def synthesize(self, text):
+        """
+        Generate speech audio for the given text
+
+        Args:
+            text (str): Text to speak
+
+        Returns:
+            bytes: MP3 audio
+        """
+        client = self.load()
+        if not self.api_key:
+            raise ValueError("Missing ELEVENLABS_API_KEY")
+        # convert() streams the mp3 back as an iterator of chunks
+        audio = client.text_to_speech.convert(voice_id=self.voice, text=text)
+        return b"".join(audio)
+
+
+class TTSFallbackChain:
+    """
+    Serve a prompt from the best tier that fits a per-turn latency budget.
+
+    Tiers, in order: audio already cached for this exact text, the primary
+    provider if it answers within the budget, cached audio for a generic
+    variant of the prompt, and finally Twilio's built-in <Say>. A primary
+    request that misses the budget keeps running in the background so the
+    next caller hearing the same prompt gets it from cache.
+
+    Missed budgets count as breaker failures just like errors, so a slow
+    provider trips the breaker as readily as a failing one. At most
+    max_inflight syntheses run or wait at once; beyond that turns go
+    straight to the fallbacks.
+    """
+
+    def __init__(self, provider=None, cache_dir="static/tts", url_prefix="/static/tts",
+                 latency_budget=1.5, breaker=None, max_workers=4, max_inflight=8):
+        self.provider = provider or ElevenLabsProvider()
+        self.cache_dir = cache_dir
+        self.url_prefix = url_prefix
+        self.latency_budget = latency_budget
+        self.breaker = breaker or CircuitBreaker()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="tts")
+        self.max_inflight = max_inflight
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self._served = {tier: 0 for tier in TIERS}
+        self._primary_timeouts = 0
+        self._primary_errors = 0
+        self._primary_shed = 0
+        self._primary_latency_total = 0.0
+        self._primary_latency_count = 0
+
+    def _cache_key(self, text):
+        return hashlib.sha1(f"{self.provider.voice}:{text}".encode("utf-8")).hexdigest()
+
+    def _cache_path(self, text):
+        return os.path.join(self.cache_dir, f"{self._cache_key(text)}.mp3")
+
+    def _cache_url(self, text):
+        return f"{self.url_prefix}/{self._cache_key(text)}.mp3"
+
+    def _cached(self, text):
+        return text and os.path.exists(self._cache_path(text))
+
+    def _generate(self, text, submitted_at):
+        """Run the primary provider and write its audio into the cache"""
+        try:
+            audio = self.provider.synthesize(text)
+            os.makedirs(self.cache_dir, exist_ok=True)
+            # Write to a temp file first so readers never see a partial mp3
+            path = self._cache_path(text)
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(audio)
+            os.replace(tmp_path, path)
+            # Measured from submission, so time spent queued behind other syntheses counts too.
+            # A late success was already counted as a missed budget; don't let it reset the breaker
+            elapsed = time.monotonic() - submitted_at
+            if elapsed <= self.latency_budget:
+                self.breaker.record_success()
+            with self._lock:
+                self._primary_latency_total += elapsed
+                self._primary_latency_count += 1
+        except Exception as e:
+            logger.error(f"Error generating TTS: {e}")
+            self.breaker.record_failure()
+            with self._lock:
+                self._primary_errors += 1
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(text, None)
+
+    def _submit(self, text):
+        """
+        Start (or join) a background synthesis for the text
+
+        Returns None when the breaker is not closed and there is nothing to
+        join, when the breaker refuses a new request, or when max_inflight
+        syntheses are already pending. The breaker is only asked once a new
+        synthesis will really be submitted, so a half-open probe always
+        reaches the provider.
+        """
+        with self._lock:
+            future = self._inflight.get(text)
+            if future is not None:
+                # Joining costs no provider call, but don't wait on work started before an outage
+                return future if self.breaker.state == 'closed' else None
+            if len(self._inflight) >= self.max_inflight:
+                self._primary_shed += 1
+                return None
+            if not self.breaker.allow_request():
+                return None
+            future = self._executor.submit(self._generate, text, time.monotonic())
+            self._inflight[text] = future
+            return future
+
+    def _serve(self, tier, text, audio_url=None):
+        with self._lock:
+            self._served[tier] += 1
+        return TTSResult(tier, text, audio_url)
+
+    def synthesize(self, text, generic_text=None, cacheable=True):
+        """
+        Get something playable for the text within the latency budget
+
+        Args:
+            text (str): The prompt to speak
+            generic_text (str): A caller-independent variant of the prompt
+                whose cached audio may be played instead (optional)
+            cacheable (bool): False for prompts built from caller input; these
+                are never synthesized into the public cache and fall back to
+                the generic variant or <Say> instead
+
+        Returns:
+            TTSResult: What to render into the TwiML response
+        """
+        if cacheable and self._cached(text):
+            return self._serve(TIER_CACHE, text, self._cache_url(text))
+
+        future = self._submit(text) if cacheable else None
+        if future is not None:
+            try:
+                future.result(timeout=self.latency_budget)
+                return self._serve(TIER_PRIMARY, text, self._cache_url(text))
+            except FutureTimeoutError:
+                logger.warning(f"TTS missed {self.latency_budget}s budget, falling back")
+                self.breaker.record_failure()
+                with self._lock:
+                    self._primary_timeouts += 1
+            except Exception:
+                pass
+
+        if generic_text:
+            if self._cached(generic_text):
+                return self._serve(TIER_GENERIC, generic_text, self._cache_url(generic_text))
+            # Warm the generic variant so later brownout turns can use it
+            self._submit(generic_text)
+
+        return self._serve(TIER_SAY, text)
+
+    def warm_up(self):
+        """Load the provider's SDK ahead of the first turn, if it has anything to load"""
+        load = getattr(self.provider, "load", None)
+        if load:
+            load()
+
+    def get_metrics(self):
+        """
+        Get counters on how each tier has been serving prompts
+
+        Returns:
+            dict: Per-tier counts, primary health and breaker state
+        """
+        with self._lock:
+            served = dict(self._served)
+            latency_count = self._primary_latency_count
+            avg_latency = self._primary_latency_total / latency_count if latency_count else None
+            metrics = {
+                'served': served,
+                'total': sum(served.values()),
+                'primary_timeouts': self._primary_timeouts,
+                'primary_errors': self._primary_errors,
+                'primary_shed': self._primary_shed,
+                'primary_avg_latency': avg_latency,
+                'latency_budget': self.latency_budget,
+            }
+        metrics['breaker_state'] = self.breaker.state
+        return metrics
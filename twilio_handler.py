@@ -1,5 +1,4 @@
 import os
-from twilio.rest import Client
 from twilio.twiml.voice_response import VoiceResponse
 import logging
 
@@ -16,6 +15,8 @@ class TwilioHandler:
         if not all([self.account_sid, self.auth_token, self.phone_number]):
             raise ValueError("Missing required Twilio environment variables")
         
+        # The REST client pulls in most of the Twilio SDK, so load it only when used
+        from twilio.rest import Client
         self.client = Client(self.account_sid, self.auth_token)
     
     def make_outbound_call(self, to_number, webhook_url=None):